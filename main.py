@@ -11,7 +11,7 @@ import argparse
 # Add the src directory to the Python path so we can import the package
 sys.path.insert(0, os.path.join(os.path.dirname(__file__), 'src'))
 
-from data_extract_tool import pdf_extractor_main, flexible_text_parser_main
+from data_extract_tool import pdf_extractor_main, flexible_text_parser_main, validate_config
 
 
 def main():
@@ -22,6 +22,9 @@ def main():
     pdf_parser = subparsers.add_parser("extract-pdf", help="Extract text from PDF files")
     pdf_parser.add_argument("--pdf-dir", required=True, help="Directory containing PDF files")
     pdf_parser.add_argument("--table", required=True, help="Base table name for storing extracted data")
+    pdf_parser.add_argument("--workers", type=int, help="Number of worker processes for PDF text extraction")
+    pdf_parser.add_argument("--batch-size", type=int, help="Number of files extracted and inserted per batch")
+    pdf_parser.add_argument("-v", "--verbose", action="store_true", help="Log per-file progress to stderr")
 
     # Flexible text parsing command
     flex_parser = subparsers.add_parser("parse-flexible", help="Parse text into flexible JSON format")
@@ -30,6 +33,10 @@ def main():
     flex_parser.add_argument("--parsed-data-origin", required=True, help="Table name containing source file contents")
     flex_parser.add_argument("--schema-name", help="Name to identify the schema")
     flex_parser.add_argument("--sample", type=int, help="Number of records to randomly sample (default: process all)")
+    flex_parser.add_argument("--concurrency", type=int, help="Maximum number of concurrent OpenAI requests")
+    flex_parser.add_argument("--model", help="OpenAI model used for extraction")
+    flex_parser.add_argument("--batch-size", type=int, help="Number of parsed records inserted per batch")
+    flex_parser.add_argument("-v", "--verbose", action="store_true", help="Log per-file progress to stderr")
     
     # Full pipeline command
     pipeline_parser = subparsers.add_parser("full-pipeline", help="Run complete PDF extraction and parsing pipeline")
@@ -38,11 +45,23 @@ def main():
     pipeline_parser.add_argument("--schema", required=True, help="Path to JSON schema file")
     pipeline_parser.add_argument("--parsed-data-destination", help="Table name for parsed data, defaults to '{table}_parsed'")
     pipeline_parser.add_argument("--sample", type=int, help="Number of records to randomly sample (default: process all)")
+    pipeline_parser.add_argument("--workers", type=int, help="Number of worker processes for PDF text extraction")
+    pipeline_parser.add_argument("--batch-size", type=int, help="Number of records inserted per batch, for both steps")
+    pipeline_parser.add_argument("--concurrency", type=int, help="Maximum number of concurrent OpenAI requests")
+    pipeline_parser.add_argument("--model", help="OpenAI model used for extraction")
+    pipeline_parser.add_argument("-v", "--verbose", action="store_true", help="Log per-file progress to stderr")
     
     args = parser.parse_args()
     
     if args.command == "extract-pdf":
-        pdf_extractor_main(["--pdf-dir", args.pdf_dir, "--table", args.table])
+        pdf_args = ["--pdf-dir", args.pdf_dir, "--table", args.table]
+        if args.workers:
+            pdf_args.extend(["--workers", str(args.workers)])
+        if args.batch_size:
+            pdf_args.extend(["--batch-size", str(args.batch_size)])
+        if args.verbose:
+            pdf_args.append("--verbose")
+        pdf_extractor_main(pdf_args)
         
     elif args.command == "parse-flexible":
         cmd_args = [
@@ -52,13 +71,31 @@ def main():
         ]
         if args.sample:
             cmd_args.extend(["--sample", str(args.sample)])
+        if args.concurrency:
+            cmd_args.extend(["--concurrency", str(args.concurrency)])
+        if args.model:
+            cmd_args.extend(["--model", args.model])
+        if args.batch_size:
+            cmd_args.extend(["--batch-size", str(args.batch_size)])
+        if args.verbose:
+            cmd_args.append("--verbose")
         flexible_text_parser_main(cmd_args)
         
     elif args.command == "full-pipeline":
-        # Step 1: Extract PDFs
+        # Both steps need their configuration, check it before spending time on extraction
+        if not validate_config():
+            sys.exit(2)
         
+        # Step 1: Extract PDFs
         print("=== STEP 1: PDF EXTRACTION ===")
-        pdf_extractor_main(["--pdf-dir", args.pdf_dir, "--table", args.table])
+        pdf_args = ["--pdf-dir", args.pdf_dir, "--table", args.table]
+        if args.workers:
+            pdf_args.extend(["--workers", str(args.workers)])
+        if args.batch_size:
+            pdf_args.extend(["--batch-size", str(args.batch_size)])
+        if args.verbose:
+            pdf_args.append("--verbose")
+        pdf_extractor_main(pdf_args)
         
         print("\n=== STEP 2: TEXT PARSING ===")
         cmd_args = [
@@ -66,10 +103,18 @@ def main():
             "--parsed-data-origin", f'{args.table}_contents',
             "--schema", args.schema, 
         ]
+        if args.concurrency:
+            cmd_args.extend(["--concurrency", str(args.concurrency)])
+        if args.model:
+            cmd_args.extend(["--model", args.model])
+        if args.batch_size:
+            cmd_args.extend(["--batch-size", str(args.batch_size)])
+        if args.verbose:
+            cmd_args.append("--verbose")
         if args.sample:
             cmd_args.extend(["--sample", str(args.sample)])
-            
-            flexible_text_parser_main(cmd_args)    
+        
+        flexible_text_parser_main(cmd_args)
     else:
         parser.print_help()
 
@@ -0,0 +1,27 @@
+"""
+Database helpers shared by the pdf_extractor and text_parser modules.
+"""
+
+def get_existing_tables(cursor, table_names):
+    """
+    Check which of the given tables exist in the current database with a single DBC.TablesV lookup.
+    
+    Args:
+        cursor: Teradata cursor
+        table_names: Iterable of table names
+    
+    Returns:
+        set: Upper-cased names of the tables that exist
+    """
+    table_names = list(dict.fromkeys(name.upper() for name in table_names))
+    if not table_names:
+        return set()
+    
+    placeholders = ", ".join("?" for _ in table_names)
+    cursor.execute(f"""
+    SELECT TableName 
+    FROM DBC.TablesV 
+    WHERE DatabaseName = DATABASE 
+    AND TableName IN ({placeholders})
+    """, table_names)
+    return {row[0].strip().upper() for row in cursor.fetchall()}
@@ -4,6 +4,7 @@ PDF Extractor module for extracting text from PDF files and storing in Teradata.
 
 from .pdf_extractor import (
     compute_checksum,
+    compute_checksums,
     extract_text_from_pdf,
     bulk_ingest,
     main as pdf_extractor_main
@@ -11,6 +12,7 @@ from .pdf_extractor import (
 
 __all__ = [
     'compute_checksum',
+    'compute_checksums',
     'extract_text_from_pdf', 
     'bulk_ingest',
     'pdf_extractor_main'
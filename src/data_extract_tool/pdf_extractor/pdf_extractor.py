@@ -1,28 +1,114 @@
 import os
+import sys
 import hashlib
 import pdfplumber
+import pypdfium2 as pdfium
 import logging
 import argparse
+from itertools import islice
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
 from datetime import datetime, timezone
-from ..utils import connect_to_teradata
+from ..utils import connect_to_teradata, get_config, setup_console_logging
+from ..db_utils import get_existing_tables
 
 LOG_FILE = "./logs/pdf_ingestion.log"
+DEFAULT_WORKERS = min(os.cpu_count() or 1, 4)
+CHECKSUM_CHUNK_SIZE = 1 << 20
+DEFAULT_BATCH_SIZE = 64
+IN_LIST_CHUNK_SIZE = 500
+
+# teradata_agkr(C) makes the insert return the generated identity column, one row per inserted row
+METADATA_INSERT_SQL = """{{fn teradata_agkr(C)}}
+    INSERT INTO {} (file_type, file_name, ingestion_time_utc, checksum, success)
+    VALUES (?, ?, ?, ?, ?)
+"""
+CONTENTS_INSERT_SQL = "INSERT INTO {} (file_id, text_content) VALUES (?, ?)"
 
 # Setup logging
 logging.basicConfig(filename=LOG_FILE, level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
 
 def compute_checksum(file_path):
-    with open(file_path, "rb") as f:
-        return hashlib.sha256(f.read()).hexdigest()
+    with open(file_path, "rb", buffering=0) as f:
+        # hashlib.file_digest is only available on Python 3.11+
+        if hasattr(hashlib, "file_digest"):
+            return hashlib.file_digest(f, "sha256").hexdigest()
+
+        digest = hashlib.sha256()
+        while chunk := f.read(CHECKSUM_CHUNK_SIZE):
+            digest.update(chunk)
+        return digest.hexdigest()
 
 def extract_text_from_pdf(file_path):
-    text = ""
+    """
+    Extract plain text from a PDF with pypdfium2, falling back to pdfplumber
+    for files pdfium cannot read.
+    """
+    try:
+        return _extract_text_pdfium(file_path)
+    except Exception as e:
+        logger.warning("pypdfium2 failed on %s, falling back to pdfplumber: %s", os.path.basename(file_path), e)
+        return _extract_text_pdfplumber(file_path)
+
+def _extract_text_pdfium(file_path):
+    pdf = pdfium.PdfDocument(file_path)
+    try:
+        pages_text = []
+        for page in pdf:
+            textpage = page.get_textpage()
+            pages_text.append(textpage.get_text_range())
+            textpage.close()
+            page.close()
+        return "\n".join(pages_text).replace("\r\n", "\n").strip()
+    finally:
+        pdf.close()
+
+def _extract_text_pdfplumber(file_path):
+    pages_text = []
     with pdfplumber.open(file_path) as pdf:
         for page in pdf.pages:
             page_text = page.extract_text()
             if page_text:
-                text += page_text + "\n"
-    return text.strip()
+                pages_text.append(page_text)
+    return "\n".join(pages_text).strip()
+
+def _extract_one(file_path):
+    """
+    Extract the text of a single PDF.
+
+    Kept at module scope so it can be pickled into worker processes.
+
+    Returns:
+        tuple: (text_content, success)
+    """
+    try:
+        return extract_text_from_pdf(file_path), True
+    except Exception as e:
+        return f"[ERROR] {str(e)}", False
+
+def compute_checksums(files, max_workers=None):
+    """
+    Compute the checksum of every file, skipping files that can't be read.
+
+    hashlib releases the GIL while hashing, so a thread pool overlaps the
+    file reads and the SHA-256 work without any inter-process overhead.
+
+    Args:
+        files: List of file paths
+        max_workers: Number of threads (defaults to os.cpu_count())
+
+    Returns:
+        dict: file_path -> checksum
+    """
+    checksums = {}
+    with ThreadPoolExecutor(max_workers=max_workers or os.cpu_count()) as executor:
+        futures = [(file_path, executor.submit(compute_checksum, file_path)) for file_path in files]
+        for file_path, future in futures:
+            try:
+                checksums[file_path] = future.result()
+            except Exception:
+                logger.exception("Failed to checksum %s, skipping it", file_path)
+    return checksums
 
 def check_and_create_tables(conn, base_table_name):
     """
@@ -41,16 +127,9 @@ def check_and_create_tables(conn, base_table_name):
     cursor = conn.cursor()
     
     try:
-        # Check if metadata table exists
-        check_query = """
-        SELECT COUNT(*) 
-        FROM DBC.TablesV 
-        WHERE TableName = ? 
-        AND DatabaseName = DATABASE
-        """
-        
-        cursor.execute(check_query, (metadata_table.upper(),))
-        metadata_exists = cursor.fetchone()[0] > 0
+        # Check both tables in one round-trip
+        existing_tables = get_existing_tables(cursor, [metadata_table, contents_table])
+        metadata_exists = metadata_table.upper() in existing_tables
         
         if not metadata_exists:
             print(f"[INFO] Creating metadata table {metadata_table}...")
@@ -66,13 +145,13 @@ def check_and_create_tables(conn, base_table_name):
             )
             """
             cursor.execute(create_metadata_query)
+            # DDL has to end its transaction when autocommit is off
+            conn.commit()
             print(f"[OK] Created metadata table {metadata_table}")
         else:
             print(f"[OK] Metadata table {metadata_table} already exists")
         
-        # Check if contents table exists
-        cursor.execute(check_query, (contents_table.upper(),))
-        contents_exists = cursor.fetchone()[0] > 0
+        contents_exists = contents_table.upper() in existing_tables
         
         if not contents_exists:
             print(f"[INFO] Creating contents table {contents_table}...")
@@ -86,6 +165,7 @@ def check_and_create_tables(conn, base_table_name):
             )
             """
             cursor.execute(create_contents_query)
+            conn.commit()
             print(f"[OK] Created contents table {contents_table}")
         else:
             print(f"[OK] Contents table {contents_table} already exists")
@@ -99,50 +179,174 @@ def check_and_create_tables(conn, base_table_name):
     finally:
         cursor.close()
 
-def bulk_ingest(files, conn, metadata_table, contents_table):
-    content_records = []
-    cursor = conn.cursor()
+def fetch_existing_checksums(cursor, metadata_table, contents_table, checksums):
+    """
+    Find which checksums were already ingested successfully.
+
+    A file only counts as ingested when its metadata row has success = 1 and
+    a contents row references it, so metadata left without contents by an
+    earlier failure is ingested again.
+
+    Args:
+        cursor: Teradata cursor
+        metadata_table: Name of the metadata table
+        contents_table: Name of the contents table
+        checksums: Iterable of file checksums
+
+    Returns:
+        set: Checksums of files with both metadata and contents stored
+    """
+    existing = set()
+    for chunk in _batched(dict.fromkeys(checksums), IN_LIST_CHUNK_SIZE):
+        placeholders = ", ".join("?" for _ in chunk)
+        cursor.execute(
+            f"""
+            SELECT m.checksum FROM {metadata_table} m
+            WHERE m.success = 1 AND m.checksum IN ({placeholders})
+            AND EXISTS (SELECT 1 FROM {contents_table} c WHERE c.file_id = m.id)
+            """,
+            chunk
+        )
+        existing.update(row[0] for row in cursor.fetchall())
+    return existing
+
+def _batched(items, size):
+    """Yield successive lists of at most `size` items (itertools.batched is Python 3.12+)."""
+    iterator = iter(items)
+    while batch := list(islice(iterator, size)):
+        yield batch
+
+def _submit_batch(executor, batch):
+    return [
+        (file_path, checksum, executor.submit(_extract_one, file_path))
+        for file_path, checksum in batch or []
+    ]
+
+def _collect_batch(pending):
+    """
+    Wait for a submitted batch and build its metadata rows.
 
-    for file_path in files:
+    Returns:
+        tuple: (metadata_rows, texts)
+    """
+    metadata_rows = []
+    texts = []
+
+    for file_path, checksum, future in pending:
         try:
+            text_content, success = future.result()
             file_name = os.path.basename(file_path)
             file_type = "pdf"
             timestamp = datetime.now(timezone.utc).strftime("%Y-%m-%d %H:%M:%S")
-            checksum = compute_checksum(file_path)
 
-            try:
-                text_content = extract_text_from_pdf(file_path)
-                success = True
-            except Exception as e:
-                logging.error(f"Failed to extract text from {file_name}: {e}")
-                text_content = f"[ERROR] {str(e)}"
-                success = False
+            if not success:
+                logger.error("Failed to extract text from %s: %s", file_name, text_content)
+
+            metadata_rows.append((file_type, file_name, timestamp, checksum, success))
+            texts.append(text_content)
 
-            cursor.execute(f"""
-                INSERT INTO {metadata_table} (file_type, file_name, ingestion_time_utc, checksum, success)
-                VALUES (?, ?, ?, ?, ?)
-            """, (file_type, file_name, timestamp, checksum, success))
+        except Exception:
+            logger.exception("Unexpected error processing file %s", file_path)
 
-            cursor.execute(f"SELECT TOP 1 id FROM {metadata_table} ORDER BY id DESC")
-            file_id = cursor.fetchone()[0]
+    return metadata_rows, texts
 
-            content_records.append((file_id, text_content))
-            logging.info(f"Ingested file: {file_name} with ID: {file_id}")
+def _insert_batch(cursor, metadata_rows, texts, metadata_insert, contents_insert):
+    """
+    Insert one batch of metadata and contents rows.
 
-        except Exception as e:
-            logging.exception(f"Unexpected error processing file {file_path}")
+    `metadata_insert` and `contents_insert` are the INSERT statements, built
+    once per run so every batch sends identical request text. The metadata
+    insert uses auto-generated key retrieval, so the new ids come back with
+    the insert itself.
 
-    if content_records:
-        try:
-            cursor.executemany(
-                f"INSERT INTO {contents_table} (file_id, text_content) VALUES (?, ?)",
-                content_records
-            )
-            logging.info(f"Inserted {len(content_records)} file contents into {contents_table}.")
-        except Exception as e:
-            logging.exception(f"Bulk insert into {contents_table} failed.")
+    Raises on any failure, so the caller can roll the whole batch back rather
+    than keep metadata rows that have no contents.
+
+    Returns:
+        int: Number of files whose contents were inserted
+    """
+    # teradatasql sends the whole parameter set as a single batch request
+    cursor.executemany(metadata_insert, metadata_rows)
+    file_ids = [row[0] for row in cursor.fetchall()]
+    logger.debug("Inserted %d metadata rows.", len(metadata_rows))
+    if len(file_ids) != len(metadata_rows):
+        raise RuntimeError(f"Expected {len(metadata_rows)} generated metadata ids, got {len(file_ids)}")
+
+    content_records = []
+    for (_, file_name, _, _, _), text_content, file_id in zip(metadata_rows, texts, file_ids):
+        content_records.append((file_id, text_content))
+        logger.debug("Ingested file: %s with ID: %s", file_name, file_id)
+
+    cursor.executemany(contents_insert, content_records)
+    logger.info("Inserted %d file contents.", len(content_records))
+
+    return len(content_records)
+
+def bulk_ingest(files, conn, metadata_table, contents_table, workers=DEFAULT_WORKERS,
+                batch_size=DEFAULT_BATCH_SIZE, skip_existing=True):
+    """
+    Extract and insert PDFs in batches of `batch_size` files.
+
+    Files whose checksum was already ingested successfully are skipped unless
+    `skip_existing` is False, as are duplicates of another file in the run.
+
+    Each batch is extracted in worker processes, then written with one
+    metadata and one contents executemany and committed as one transaction.
+    A batch that fails is rolled back, so its files are retried on the next
+    run. `conn` must have autocommit off (conn.autocommit = False),
+    otherwise every statement is committed on its own and can't be rolled back.
+
+    Returns:
+        int: Number of files whose contents were inserted
+    """
+    batch_size = max(1, batch_size)
+    ingested = 0
+    metadata_insert = METADATA_INSERT_SQL.format(metadata_table)
+    contents_insert = CONTENTS_INSERT_SQL.format(contents_table)
+    cursor = conn.cursor()
+
+    try:
+        # Phase 0: checksums are cheap compared to extraction, use them to skip known files
+        checksums = compute_checksums(files)
+        existing = fetch_existing_checksums(cursor, metadata_table, contents_table, checksums.values()) if skip_existing else set()
+        # End the read transaction now, so its table locks aren't held while the first batch is extracted
+        conn.commit()
+
+        to_ingest = {}
+        for file_path, checksum in checksums.items():
+            if checksum not in existing and checksum not in to_ingest:
+                to_ingest[checksum] = file_path
+
+        skipped = len(checksums) - len(to_ingest)
+        if skipped:
+            logger.info("Skipping %d already ingested or duplicate files.", skipped)
+            print(f"[INFO] Skipping {skipped} already ingested or duplicate files")
+
+        with ProcessPoolExecutor(max_workers=max(1, workers)) as executor:
+            batches = _batched(((file_path, checksum) for checksum, file_path in to_ingest.items()), batch_size)
+            pending = _submit_batch(executor, next(batches, None))
+
+            while pending:
+                current = pending
+                # Keep the workers busy on the next batch while this one is inserted
+                pending = _submit_batch(executor, next(batches, None))
+                metadata_rows, texts = _collect_batch(current)
+                if not metadata_rows:
+                    continue
 
-    cursor.close()
+                try:
+                    ingested += _insert_batch(
+                        cursor, metadata_rows, texts,
+                        metadata_insert=metadata_insert, contents_insert=contents_insert
+                    )
+                    conn.commit()
+                except Exception:
+                    logger.exception("Failed to ingest a batch of %d files, rolling it back.", len(metadata_rows))
+                    conn.rollback()
+    finally:
+        cursor.close()
+
+    return ingested
 
 def main(argv=None):
     parser = argparse.ArgumentParser(description="Ingest PDF files into Teradata.")
@@ -156,12 +360,35 @@ def main(argv=None):
         required=True,
         help="Base table name for storing PDF data (will create {table}_metadata and {table}_contents)"
     )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=DEFAULT_WORKERS,
+        help=f"Number of worker processes used for PDF text extraction (default: {DEFAULT_WORKERS})"
+    )
+    parser.add_argument(
+        "--batch-size",
+        type=int,
+        default=DEFAULT_BATCH_SIZE,
+        help=f"Number of files extracted and inserted per batch (default: {DEFAULT_BATCH_SIZE})"
+    )
+    parser.add_argument(
+        "-v", "--verbose",
+        action="store_true",
+        help="Log per-file progress to stderr"
+    )
     
     # Use provided arguments or default to sys.argv
     args = parser.parse_args(argv)
+    # Only Teradata is needed here, extract-pdf must work without an OpenAI key
+    if not get_config().validate_teradata_config():
+        sys.exit(2)
+    setup_console_logging(args.verbose)
 
     try:
+        # Each batch is its own transaction so a failed batch can be rolled back
         conn = connect_to_teradata()
+        conn.autocommit = False
         
         # Check and create tables if necessary
         print(f"[INFO] Checking tables for base name: {args.table}")
@@ -170,19 +397,20 @@ def main(argv=None):
         pdf_dir = args.pdf_dir
         files = [os.path.join(pdf_dir, f) for f in os.listdir(pdf_dir) if f.lower().endswith(".pdf")]
         if not files:
-            logging.warning(f"No PDF files found in {pdf_dir}")
-            print(f"[WARNING] No PDF files found in {pdf_dir}")
+            logger.warning("No PDF files found in %s", pdf_dir)
         else:
             print(f"[INFO] Found {len(files)} PDF files to process")
             
-        bulk_ingest(files, conn, metadata_table, contents_table)
+        bulk_ingest(
+            files, conn, metadata_table, contents_table,
+            workers=args.workers, batch_size=args.batch_size
+        )
         conn.commit()
         conn.close()
-        logging.info("PDF ingestion completed successfully.")
+        logger.info("PDF ingestion completed successfully.")
         print("[OK] PDF ingestion completed successfully.")
-    except Exception as e:
-        logging.exception("Failed to connect or ingest PDFs.")
-        print(f"[ERROR] Failed to connect or ingest PDFs: {e}")
+    except Exception:
+        logger.exception("Failed to connect or ingest PDFs.")
 
 if __name__ == "__main__":
     main()
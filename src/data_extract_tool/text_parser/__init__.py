@@ -3,15 +3,21 @@ Text Parser module for parsing extracted text using OpenAI and storing structure
 """
 from .flexible_text_parser import (
     extract_data_from_text,
+    prepare_schema_context,
+    get_schema_validator,
     check_and_create_table,
-    insert_parsed_data_to_teradata,
+    insert_parsed_rows,
+    parse_file_contents,
     main as flexible_text_parser_main
 )
 
 __all__ = [
     'extract_data_from_text',
+    'prepare_schema_context',
+    'get_schema_validator',
     'validate_required_fields',
     'check_and_create_table',
-    'insert_parsed_data_to_teradata',
+    'insert_parsed_rows',
+    'parse_file_contents',
     'flexible_text_parser_main'
 ]
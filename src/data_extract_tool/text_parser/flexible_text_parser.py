@@ -1,13 +1,44 @@
 import os
+import sys
 import argparse
+import asyncio
 import json
-from openai import OpenAI
-from ..utils import connect_to_teradata, get_openai_config
+import re
+import logging
+import fastjsonschema
+import orjson
+from openai import AsyncOpenAI
+from ..utils import connect_to_teradata, get_openai_config, setup_console_logging, validate_config
+from ..db_utils import get_existing_tables
+
+DEFAULT_CONCURRENCY = 8
+DEFAULT_MODEL = "gpt-4o-mini"
+FETCH_SIZE = 64
+DEFAULT_BATCH_SIZE = 64
+
+# Structured outputs require an object at the root, array schemas are wrapped under this key
+ARRAY_WRAPPER_KEY = "items"
+
+SYSTEM_PROMPT = (
+    """
+    You are a medical data analyst. Extract structured data from health insurance documents according to the provided schema.
+    Return a JSON matching the schema structure exactly don't return object when array is requested or array when object is requested.
+    """
+)
+
+logger = logging.getLogger(__name__)
+
+_validators = {}
 
 def get_openai_client():
-    """Get OpenAI client with configuration from centralized config."""
+    """
+    Create an async OpenAI client from centralized config.
+    
+    The client is bound to the event loop it is used on, so create one per
+    asyncio.run() and close it when done (use it as an async context manager).
+    """
     openai_config = get_openai_config()
-    return OpenAI(api_key=openai_config["api_key"])
+    return AsyncOpenAI(api_key=openai_config["api_key"])
 
 def get_file_contents(conn, parsed_data_origin, sample=None):
     """
@@ -18,8 +49,8 @@ def get_file_contents(conn, parsed_data_origin, sample=None):
         parsed_data_origin: Name of the table containing file contents
         sample: Number of records to sample (None for all records)
     
-    Returns:
-        List of tuples: (file_id, text_content)
+    Yields:
+        Tuples of (file_id, text_content), fetched FETCH_SIZE rows at a time
     """
     cursor = conn.cursor()
     
@@ -29,34 +60,98 @@ def get_file_contents(conn, parsed_data_origin, sample=None):
     else:
         query = f"SELECT file_id, text_content FROM {parsed_data_origin}"
     
-    cursor.execute(query)
-    return cursor.fetchall()
+    try:
+        cursor.execute(query)
+        while True:
+            rows = cursor.fetchmany(FETCH_SIZE)
+            if not rows:
+                break
+            yield from rows
+    finally:
+        cursor.close()
 
 def load_schema(schema_path):
     with open(schema_path, 'r') as f:
         return json.load(f)
 
-def extract_data_from_text(text, schema):
-    """Extract data from text using OpenAI with centralized configuration."""
-    client = get_openai_client()
+def get_schema_validator(schema):
+    """
+    Get a compiled validator for the schema, compiling it only once per schema object.
+    
+    Args:
+        schema: Parsed JSON schema
+    
+    Returns:
+        callable: Validator raising fastjsonschema.JsonSchemaException on invalid data
+    """
+    # Keep a reference to the schema so its id() can't be reused by another object
+    cached = _validators.get(id(schema))
+    if cached is None or cached[0] is not schema:
+        cached = (schema, fastjsonschema.compile(schema))
+        _validators[id(schema)] = cached
+    return cached[1]
+
+def prepare_schema_context(schema):
+    """
+    Render the schema section of the prompt, called once per run since the schema is constant.
     
+    Args:
+        schema: Parsed JSON schema
+    
+    Returns:
+        tuple: (schema_str, schema_type)
+    """
     # Handle both array and object schemas
     if "items" in schema and "properties" in schema["items"]:
         # Array schema (like schema_alt.json)
-        schema_str = json.dumps(schema["items"]["properties"], indent=2)
-        schema_type = "array"
-    else:
-        # Object schema (like schema.json)
-        schema_str = json.dumps(schema["properties"], indent=2)
-        schema_type = "object"
-    
-    system_prompt = (
-        f"""
-        You are a medical data analyst. Extract structured data from health insurance documents according to the provided schema.
-        Return a JSON matching the schema structure exactly don't return object when array is requested or array when object is requested.
-        """
-    )
+        return json.dumps(schema["items"]["properties"], indent=2), "array"
+    # Object schema (like schema.json)
+    return json.dumps(schema["properties"], indent=2), "object"
+
+def build_response_format(schema, schema_name):
+    """
+    Build the OpenAI structured output response_format for a schema.
+    
+    Array schemas are wrapped in an object under ARRAY_WRAPPER_KEY since the
+    API only accepts an object at the root. Strict mode is left off because it
+    requires every property to be required, which user schemas generally aren't.
     
+    Args:
+        schema: Parsed JSON schema
+        schema_name: Name to identify the schema
+    
+    Returns:
+        dict: response_format argument for chat.completions.create
+    """
+    json_schema = {key: value for key, value in schema.items() if key != "$schema"}
+    if json_schema.get("type") == "array":
+        json_schema = {
+            "type": "object",
+            "properties": {ARRAY_WRAPPER_KEY: json_schema},
+            "required": [ARRAY_WRAPPER_KEY]
+        }
+    
+    # Names may only contain a-z, A-Z, 0-9, underscores and dashes
+    name = re.sub(r"[^a-zA-Z0-9_-]", "_", os.path.splitext(schema_name)[0])[:64] or "schema"
+    return {
+        "type": "json_schema",
+        "json_schema": {"name": name, "schema": json_schema, "strict": False}
+    }
+
+async def extract_data_from_text(text, schema_str, schema_type, client, model=DEFAULT_MODEL, response_format=None):
+    """
+    Extract data from text using OpenAI.
+    
+    Args:
+        text: Document text
+        schema_str, schema_type: Rendered schema context (see prepare_schema_context)
+        client: AsyncOpenAI client
+        model: OpenAI model name
+        response_format: Structured output format (see build_response_format)
+    
+    Returns:
+        tuple: (parsed_data, error)
+    """
     user_prompt = f"""
         Schema:
         {schema_str}
@@ -69,27 +164,33 @@ def extract_data_from_text(text, schema):
         """
 
     try:
-        response = client.chat.completions.create(
-            model="gpt-4",
-            messages=[
-                {"role": "system", "content": system_prompt},
+        request = {
+            "model": model,
+            "messages": [
+                {"role": "system", "content": SYSTEM_PROMPT},
                 {"role": "user", "content": user_prompt}
             ],
-            temperature=0.2
-        )
+            "temperature": 0.2
+        }
+        if response_format is not None:
+            request["response_format"] = response_format
+        
+        response = await client.chat.completions.create(**request)
         content = response.choices[0].message.content
         
         # Try to parse the JSON response
         try:
             parsed_data = json.loads(content)
+            if response_format is not None and schema_type == "array" and isinstance(parsed_data, dict):
+                parsed_data = parsed_data.get(ARRAY_WRAPPER_KEY, parsed_data)
             return parsed_data, None
         except json.JSONDecodeError as e:
-            print(f"Failed to parse OpenAI response as JSON: {e}")
-            print(f"Raw response: {content}")
+            logger.warning("Failed to parse OpenAI response as JSON: %s", e)
+            logger.debug("Raw response: %s", content)
             return None, str(e)
             
     except Exception as e:
-        print(f"OpenAI API call failed: {e}")
+        logger.warning("OpenAI API call failed: %s", e)
         return None, str(e)
 
 def check_and_create_table(conn, table_name):
@@ -107,15 +208,7 @@ def check_and_create_table(conn, table_name):
     
     try:
         # Check if table exists
-        check_query = """
-        SELECT COUNT(*) 
-        FROM DBC.TablesV 
-        WHERE TableName = ? 
-        AND DatabaseName = DATABASE
-        """
-        
-        cursor.execute(check_query, (table_name.upper(),))
-        table_exists = cursor.fetchone()[0] > 0
+        table_exists = table_name.upper() in get_existing_tables(cursor, [table_name])
         
         if table_exists:
             print(f"[OK] Table {table_name} already exists")
@@ -147,9 +240,20 @@ def check_and_create_table(conn, table_name):
     finally:
         cursor.close()
 
-def insert_parsed_data_to_teradata(conn, file_id, schema_name, parsed_data, table_name):
+def _dumps(value):
+    """Serialize a value for the JSON column, falling back to json for values orjson rejects (e.g. integers over 64 bits)."""
+    try:
+        return orjson.dumps(value).decode()
+    except orjson.JSONEncodeError:
+        return json.dumps(value)
+
+def insert_parsed_rows(cursor, rows, table_name):
     """
-    Insert parsed data into a general Teradata table.
+    Insert a batch of parsed rows into a general Teradata table with a single executemany.
+    
+    If the batch fails, it is retried row by row so one bad row doesn't discard
+    the rest. With autocommit on, a failed batch request is rolled back as a
+    whole, so the retry does not duplicate rows.
     
     Table structure should be:
     CREATE TABLE parsed_data_general (
@@ -160,9 +264,15 @@ def insert_parsed_data_to_teradata(conn, file_id, schema_name, parsed_data, tabl
         parsing_timestamp TIMESTAMP(6) DEFAULT CURRENT_TIMESTAMP,
         PRIMARY KEY (id)
     );
-    """
-    cursor = conn.cursor()
     
+    Args:
+        cursor: Teradata cursor, reused across batches
+        rows: List of (file_id, schema_name, parsed_data_json) tuples
+        table_name: Name of the destination table
+    
+    Returns:
+        int: Number of rows inserted
+    """
     insert_query = f"""
     INSERT INTO {table_name} (
         file_id, 
@@ -172,25 +282,133 @@ def insert_parsed_data_to_teradata(conn, file_id, schema_name, parsed_data, tabl
     """
     
     try:
-        # Convert data to JSON string for storage
-        parsed_data_json = json.dumps(parsed_data) if parsed_data is not None else None
+        cursor.executemany(insert_query, rows)
+        logger.debug("Inserted %d parsed records into %s", len(rows), table_name)
+        return len(rows)
+    except Exception as e:
+        logger.warning("Batch insert of %d parsed records into %s failed, retrying row by row: %s", len(rows), table_name, e)
+    
+    inserted = 0
+    for row in rows:
+        try:
+            cursor.execute(insert_query, row)
+            inserted += 1
+        except Exception as e:
+            logger.error("Error inserting parsed data for file %s into %s: %s", row[0], table_name, e)
+    return inserted
+
+async def parse_file_contents(rows, schema_context, client, concurrency=DEFAULT_CONCURRENCY, model=DEFAULT_MODEL, response_format=None):
+    """
+    Parse file contents concurrently, keeping at most `concurrency` OpenAI requests in flight.
+    
+    Rows are pulled in a worker thread, so a blocking database fetch does not
+    stall the requests already in flight.
+    
+    Args:
+        rows: Iterable of (file_id, text_content) tuples
+        schema_context: (schema_str, schema_type) from prepare_schema_context
+        client: AsyncOpenAI client
+        concurrency: Maximum number of concurrent OpenAI requests
+        model: OpenAI model name
+        response_format: Structured output format (see build_response_format)
+    
+    Yields:
+        Tuples of (file_id, parsed_data, error), in completion order
+    """
+    schema_str, schema_type = schema_context
+    concurrency = max(1, concurrency)
+    pending = set()
+    
+    async def parse(file_id, text):
+        parsed_data, error = await extract_data_from_text(text, schema_str, schema_type, client, model, response_format)
+        return file_id, parsed_data, error
+    
+    rows = iter(rows)
+    while True:
+        row = await asyncio.to_thread(next, rows, None)
+        if row is None:
+            break
+        file_id, text = row
+        logger.debug("Queued file ID: %s with text length: %d", file_id, len(text))
         
-        values = [
-            file_id,
-            schema_name,
-            parsed_data_json
-        ]
+        if not text.strip():
+            logger.warning("Skipping empty file ID: %s", file_id)
+            continue
         
-        cursor.execute(insert_query, values)
-        print(f"[OK] Inserted parsed data for file {file_id} into {table_name}")
-        print(f"   Schema: {schema_name}")
-        print(f"   Data length: {len(str(parsed_data)) if parsed_data else 0} characters")
+        # Wait for a free slot before pulling more rows, so only `concurrency` texts are held at once
+        if len(pending) >= concurrency:
+            done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                yield task.result()
         
-    except Exception as e:
-        print(f"[ERROR] Error inserting parsed data for file {file_id}: {e}")
-        print(f"   Data length: {len(str(parsed_data)) if parsed_data else 0} characters")
+        pending.add(asyncio.create_task(parse(file_id, text)))
+    
+    while pending:
+        done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+        for task in done:
+            yield task.result()
+
+async def _parse_and_insert(conn, args, schema_context, schema_name, validate_fn, response_format):
+    """
+    Parse every source row and insert the results every `args.batch_size` rows.
+    
+    The OpenAI client is created for this run and closed before the event loop
+    ends; inserts run in a worker thread so they overlap with pending requests.
+    
+    Returns:
+        tuple: (processed_files, successful_parses, failed_inserts)
+    """
+    processed_files = 0
+    successful_parses = 0
+    failed_inserts = 0
+    parsed_rows = []
+    batch_size = max(1, args.batch_size)
+    cursor = conn.cursor()
+    
+    async def flush(rows):
+        inserted = await asyncio.to_thread(insert_parsed_rows, cursor, rows, args.parsed_data_destination)
+        return len(rows) - inserted
+    
+    try:
+        async with get_openai_client() as client:
+            # Extract data using OpenAI, requests are issued concurrently
+            results = parse_file_contents(
+                get_file_contents(conn, args.parsed_data_origin, args.sample),
+                schema_context,
+                client,
+                args.concurrency,
+                args.model,
+                response_format
+            )
+            
+            async for file_id, parsed_data, error in results:
+                if not error:
+                    try:
+                        validate_fn(parsed_data)
+                    except fastjsonschema.JsonSchemaException as e:
+                        error = f"Schema validation failed: {e.message}"
+                
+                if error:
+                    logger.warning("Parsing failed for file ID: %s: %s", file_id, error)
+                    # Still insert the record to track the failure
+                    parsed_rows.append((file_id, schema_name, _dumps(error)))
+                else:
+                    logger.debug("Parsing successful for file ID: %s", file_id)
+                    successful_parses += 1
+                    parsed_rows.append((file_id, schema_name, _dumps(parsed_data)))
+                
+                processed_files += 1
+                
+                if len(parsed_rows) >= batch_size:
+                    failed_inserts += await flush(parsed_rows)
+                    parsed_rows = []
+            
+            if parsed_rows:
+                failed_inserts += await flush(parsed_rows)
     finally:
         cursor.close()
+    
+    return processed_files, successful_parses, failed_inserts
 
 def main(argv=None):
     parser = argparse.ArgumentParser(description="Extract flexible structured data from insurance documents using OpenAI.")
@@ -199,10 +417,20 @@ def main(argv=None):
     parser.add_argument("--parsed-data-origin", required=True, help="Teradata table name containing the source file contents.")
     parser.add_argument("--schema-name", help="Name to identify the schema (defaults to filename).")
     parser.add_argument("--sample", type=int, help="Number of records to randomly sample (default: process all files)")
+    parser.add_argument("--concurrency", type=int, default=DEFAULT_CONCURRENCY, help=f"Maximum number of concurrent OpenAI requests (default: {DEFAULT_CONCURRENCY})")
+    parser.add_argument("--model", default=DEFAULT_MODEL, help=f"OpenAI model used for extraction (default: {DEFAULT_MODEL})")
+    parser.add_argument("--batch-size", type=int, default=DEFAULT_BATCH_SIZE, help=f"Number of parsed records inserted per batch (default: {DEFAULT_BATCH_SIZE})")
+    parser.add_argument("-v", "--verbose", action="store_true", help="Log per-file progress to stderr")
     args = parser.parse_args(argv)
+    if not validate_config():
+        sys.exit(2)
+    setup_console_logging(args.verbose)
 
     schema = load_schema(args.schema)
+    schema_context = prepare_schema_context(schema)
+    validate_fn = get_schema_validator(schema)
     schema_name = args.schema_name or os.path.basename(args.schema)
+    response_format = build_response_format(schema, schema_name)
     conn = connect_to_teradata()
 
     # Check if table exists and create if necessary
@@ -218,35 +446,9 @@ def main(argv=None):
     else:
         print(f"[INFO] Processing all files from {args.parsed_data_origin}")
 
-    processed_files = 0
-    successful_parses = 0
-    
-    for file_id, text in get_file_contents(conn, args.parsed_data_origin, args.sample):
-        print(f"\n[INFO] Processing file ID: {file_id} with text length: {len(text)}")
-        
-        if not text.strip():
-            print("   [WARNING] Skipping empty file")
-            continue
-        
-        # Extract data using OpenAI
-        parsed_data, error = extract_data_from_text(text, schema)
-        
-        if error:
-            print(f"   [ERROR] Parsing failed: {error}")
-            # Still insert the record to track the failure
-            insert_parsed_data_to_teradata(
-                conn, file_id, schema_name, error, args.parsed_data_destination
-            )
-        else:
-            print(f"   [OK] Parsing successful")
-            successful_parses += 1
-            
-            # Insert into general table
-            insert_parsed_data_to_teradata(
-                conn, file_id, schema_name, parsed_data, args.parsed_data_destination
-            )
-        
-        processed_files += 1
+    processed_files, successful_parses, failed_inserts = asyncio.run(_parse_and_insert(
+        conn, args, schema_context, schema_name, validate_fn, response_format
+    ))
 
     conn.commit()
     conn.close()
@@ -255,6 +457,7 @@ def main(argv=None):
     print(f"   Files processed: {processed_files}")
     print(f"   Successful parses: {successful_parses}")
     print(f"   Failed parses: {processed_files - successful_parses}")
+    print(f"   Failed inserts: {failed_inserts}")
     print(f"   Success rate: {(successful_parses/processed_files*100):.1f}%" if processed_files > 0 else "   Success rate: 0%")
 
 if __name__ == "__main__":
@@ -4,7 +4,9 @@ Provides centralized configuration management and Teradata connection functional
 """
 
 import os
+import logging
 import teradatasql
+from types import MappingProxyType
 from dotenv import load_dotenv
 
 # Load environment variables from .env
@@ -26,14 +28,18 @@ class Config:
         self.openai = {
             "api_key": os.getenv("OPENAI_API_KEY"),
         }
+        
+        # Read-only views handed out to callers, so the config isn't copied on every call
+        self._teradata_view = MappingProxyType(self.teradata)
+        self._openai_view = MappingProxyType(self.openai)
     
     def get_teradata_config(self):
-        """Get Teradata configuration."""
-        return self.teradata.copy()
+        """Get a read-only view of the Teradata configuration."""
+        return self._teradata_view
     
     def get_openai_config(self):
-        """Get OpenAI configuration."""
-        return self.openai.copy()
+        """Get a read-only view of the OpenAI configuration."""
+        return self._openai_view
     
     def validate_teradata_config(self):
         """Validate Teradata configuration."""
@@ -79,7 +85,7 @@ def get_teradata_config():
     Get Teradata configuration from environment variables.
     
     Returns:
-        dict: Dictionary containing Teradata connection parameters
+        Mapping: Read-only mapping containing Teradata connection parameters
     """
     return config.get_teradata_config()
 
@@ -88,7 +94,7 @@ def get_openai_config():
     Get OpenAI configuration from environment variables.
     
     Returns:
-        dict: Dictionary containing OpenAI configuration parameters
+        Mapping: Read-only mapping containing OpenAI configuration parameters
     """
     return config.get_openai_config()
 
@@ -137,6 +143,28 @@ def test_connection(teradata_config=None):
         print(f"Connection test failed: {e}")
         return False
 
+def setup_console_logging(verbose=False):
+    """
+    Send warnings and errors of the package loggers to stderr, and DEBUG level messages when verbose.
+    
+    Per-file progress is logged at DEBUG, so it costs nothing unless verbose is set.
+    
+    Args:
+        verbose (bool): Whether to enable verbose logging
+    """
+    level = logging.DEBUG if verbose else logging.WARNING
+    package_logger = logging.getLogger(__name__.rpartition(".")[0])
+    if verbose:
+        package_logger.setLevel(logging.DEBUG)
+    
+    handler = next((h for h in package_logger.handlers if getattr(h, "_console_handler", False)), None)
+    if handler is None:
+        handler = logging.StreamHandler()
+        handler.setFormatter(logging.Formatter("[%(levelname)s] %(message)s"))
+        handler._console_handler = True
+        package_logger.addHandler(handler)
+    handler.setLevel(level)
+
 def validate_config():
     """
     Validate that all required configuration parameters are present.
@@ -0,0 +1,37 @@
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+import main
+
+
+def run_full_pipeline(monkeypatch, *extra_args):
+    """Run main() for full-pipeline with both steps stubbed, return the parser calls."""
+    parser_calls = []
+    monkeypatch.setattr(main, "validate_config", lambda: True)
+    monkeypatch.setattr(main, "pdf_extractor_main", lambda argv: None)
+    monkeypatch.setattr(main, "flexible_text_parser_main", parser_calls.append)
+    monkeypatch.setattr(
+        sys, "argv",
+        ["main.py", "full-pipeline", "--pdf-dir", "x", "--table", "t", "--schema", "s", *extra_args]
+    )
+    main.main()
+    return parser_calls
+
+
+def test_full_pipeline_parses_without_sample(monkeypatch):
+    parser_calls = run_full_pipeline(monkeypatch)
+
+    assert len(parser_calls) == 1
+    cmd_args = parser_calls[0]
+    assert cmd_args[cmd_args.index("--parsed-data-origin") + 1] == "t_contents"
+    assert "--sample" not in cmd_args
+
+
+def test_full_pipeline_forwards_sample(monkeypatch):
+    parser_calls = run_full_pipeline(monkeypatch, "--sample", "5")
+
+    assert len(parser_calls) == 1
+    cmd_args = parser_calls[0]
+    assert cmd_args[cmd_args.index("--sample") + 1] == "5"